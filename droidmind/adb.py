@@ -5,18 +5,235 @@ This module provides a wrapper around the system's ADB binary to interact with A
 """
 
 import asyncio
-from contextlib import AsyncExitStack
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+import itertools
 import os
-import random
 import re
 import shlex
-import string
 import time
 
+import aiofiles
+
 from droidmind.log import logger
-from droidmind.packages import parse_package_list
+from droidmind.packages import LIST_ALL_PACKAGES_CMD, LIST_THIRD_PARTY_PACKAGES_CMD, parse_package_list
 from droidmind.security import log_command_execution, validate_adb_command
 
+# Matches one "[key]: [value]" entry of `getprop` output
+_GETPROP_RE = re.compile(r"\[([^\]]+)\]:\s*\[([^\]]*)\]")
+
+# Matches the "model:<name>" field of `adb devices -l` output
+_DEVICE_MODEL_RE = re.compile(r"model:(\S+)")
+
+# How long a successful command vouches for a device being connected, in seconds
+_CONNECTED_TTL = 5.0
+
+_VALID_REBOOT_MODES = frozenset({"normal", "recovery", "bootloader"})
+
+# Leading bytes of every PNG file
+_PNG_SIGNATURE = b"\x89PNG"
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read a positive integer setting from the environment, falling back to a default."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+    except ValueError:
+        parsed = 0
+    if parsed < 1:
+        logger.warning("Ignoring invalid %s=%r; using %d", name, value, default)
+        return default
+    return parsed
+
+
+# Caps on in-flight device commands, overall and per device, so bursts queue here instead of piling onto the adb server
+_MAX_CONCURRENT_COMMANDS = _env_int("DROIDMIND_ADB_MAX_CONCURRENCY", 32)
+_MAX_CONCURRENT_DEVICE_COMMANDS = _env_int("DROIDMIND_ADB_MAX_DEVICE_CONCURRENCY", 8)
+
+
+def _parse_getprop(output: str) -> dict[str, str]:
+    """Parse raw `getprop` output into a dictionary of properties."""
+    return dict(_GETPROP_RE.findall(output))
+
+
+class PersistentShell:
+    """A long-lived `adb shell` session for running many commands on one device.
+
+    Each command is written to the shell's stdin followed by an end marker that
+    carries its exit status, and output is read back up to that marker. This
+    saves spawning an adb process and opening a new device connection per
+    command. Commands run one at a time; concurrent callers are serialized.
+    """
+
+    def __init__(self, adb_path: str, serial: str) -> None:
+        """Initialize the session; call start() before running commands.
+
+        Args:
+            adb_path: Path to the ADB binary
+            serial: Device serial number
+        """
+        self.serial = serial
+        self._adb_path = adb_path
+        self._process: asyncio.subprocess.Process | None = None
+        self._lock = asyncio.Lock()
+        self._counter = itertools.count()
+
+    @property
+    def closed(self) -> bool:
+        """Whether the shell process is not running."""
+        return self._process is None or self._process.returncode is not None
+
+    async def start(self) -> None:
+        """Start the underlying `adb shell` process."""
+        if not self.closed:
+            return
+
+        logger.debug("Starting persistent shell on %s", self.serial)
+        self._process = await asyncio.create_subprocess_exec(
+            self._adb_path,
+            "-s",
+            self.serial,
+            "shell",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+
+    async def run(self, command: str, timeout_seconds: float | None = None) -> tuple[str, int]:
+        """Run a command in the session.
+
+        Args:
+            command: The shell command to run
+            timeout_seconds: Command timeout in seconds (None for no timeout)
+
+        Returns:
+            Tuple of (output, exit status), with stderr folded into the output
+
+        Raises:
+            RuntimeError: If the session is closed, dies, or the command times out
+        """
+        return (await self.run_batch([command], timeout_seconds))[0]
+
+    async def run_batch(self, commands: list[str], timeout_seconds: float | None = None) -> list[tuple[str, int]]:
+        """Run several commands in the session in a single round-trip.
+
+        All commands are sent at once and run in order; a failing command does not
+        stop the ones after it.
+
+        Args:
+            commands: The shell commands to run
+            timeout_seconds: Timeout for the whole batch in seconds (None for no timeout)
+
+        Returns:
+            One (output, exit status) tuple per command, with stderr folded into the output
+
+        Raises:
+            RuntimeError: If the session is closed, dies, or the batch times out
+        """
+        async with self._lock:
+            if self.closed:
+                raise RuntimeError(f"Persistent shell on {self.serial} is closed")
+            process = self._process
+            assert process is not None
+            assert process.stdin is not None
+            assert process.stdout is not None
+
+            script = bytearray()
+            markers = []
+            for command in commands:
+                log_command_execution(command)
+                marker = f"__DROIDMIND_END_{next(self._counter)}__".encode()
+                markers.append(marker)
+                # Run the command with stdin detached so it can't swallow later commands and stderr
+                # folded in on the device (adb's shell protocol carries stderr as a separate stream
+                # that could arrive after the marker), then print the marker on its own line
+                # followed by the command's exit status
+                script += b"{ " + command.encode() + b"\n} </dev/null 2>&1\n__rc=$?; echo; echo " + marker + b"$__rc\n"
+            # Feed the script while reading output, so a large batch can't fill both pipes and stall
+            writer = asyncio.create_task(self._feed(process.stdin, bytes(script)))
+
+            buffer = bytearray()
+            last = markers[-1] if markers else b""
+            try:
+                async with asyncio.timeout(timeout_seconds):
+                    end = -1
+                    search_from = 0
+                    while markers:
+                        if end < 0:
+                            end = buffer.find(last, search_from)
+                        if end >= 0 and buffer.find(b"\n", end) >= 0:
+                            break
+                        chunk = await process.stdout.read(65536)
+                        if not chunk:
+                            raise ConnectionResetError("shell exited unexpectedly")
+                        # Only rescan the new data, plus enough overlap to catch a marker split across reads
+                        search_from = max(0, len(buffer) - len(last))
+                        buffer += chunk
+                    await writer
+            # The session is out of sync with its output after any failure, so it can't be reused
+            except TimeoutError as e:
+                writer.cancel()
+                await self._terminate()
+                raise RuntimeError(f"Command timed out on {self.serial}: {'; '.join(commands)}") from e
+            except OSError as e:
+                writer.cancel()
+                await self._terminate()
+                raise RuntimeError(f"Persistent shell on {self.serial} failed: {e}") from e
+            except BaseException:
+                # A cancelled caller leaves its output unread, where the next command would pick it up
+                writer.cancel()
+                await self._terminate()
+                raise
+
+            results = []
+            start = 0
+            for marker in markers:
+                end = buffer.find(marker, start)
+                line_end = buffer.find(b"\n", end)
+                # Drop the newline echoed ahead of the marker
+                output = buffer[start : end - 1].decode("utf-8", errors="replace")
+                results.append((output.strip(), int(buffer[end + len(marker) : line_end])))
+                start = line_end + 1
+            return results
+
+    @staticmethod
+    async def _feed(stdin: asyncio.StreamWriter, data: bytes) -> None:
+        """Write data to the shell's stdin and wait until it has been accepted."""
+        stdin.write(data)
+        await stdin.drain()
+
+    async def _terminate(self) -> None:
+        """Kill the shell process without a graceful exit."""
+        if not self.closed:
+            assert self._process is not None
+            self._process.kill()
+            await self._process.wait()
+
+    async def close(self) -> None:
+        """Exit the shell session."""
+        if self.closed:
+            return
+
+        assert self._process is not None
+        assert self._process.stdin is not None
+        logger.debug("Closing persistent shell on %s", self.serial)
+        try:
+            self._process.stdin.write(b"exit\n")
+            self._process.stdin.close()
+            await asyncio.wait_for(self._process.wait(), timeout=2.0)
+        except (TimeoutError, OSError):
+            await self._terminate()
+
+    async def __aenter__(self) -> "PersistentShell":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_exc: object) -> None:
+        await self.close()
+
 
 class ADBWrapper:
     """A wrapper around the system ADB binary to interact with Android devices."""
@@ -42,6 +259,20 @@ class ADBWrapper:
         self._devices_cache: list[dict[str, str]] = []
         self._cache_time: float = 0.0
 
+        # Read-only (ro.*) properties per serial; these cannot change until the device reboots
+        self._prop_cache: dict[str, dict[str, str]] = {}
+
+        # Monotonic time of the last successful command per serial
+        self._last_ok: dict[str, float] = {}
+
+        # Shared persistent shell sessions per serial, opened on demand
+        self._shells: dict[str, PersistentShell] = {}
+        self._shell_locks: dict[str, asyncio.Lock] = {}
+
+        # Concurrency limits for device commands; waiters are served in FIFO order
+        self._command_slots = asyncio.Semaphore(_MAX_CONCURRENT_COMMANDS)
+        self._device_command_slots: dict[str, asyncio.Semaphore] = {}
+
         logger.debug("ADBWrapper initialized with binary path: %s", self.adb_path)
 
     async def _run_adb_command(
@@ -57,6 +288,31 @@ class ADBWrapper:
         Returns:
             Tuple of (stdout, stderr) as strings
 
+        Raises:
+            RuntimeError: If command fails and check=True
+        """
+        stdout_bytes, stderr_bytes = await self._run_adb_command_raw(args, timeout_seconds, check)
+        return (
+            stdout_bytes.decode("utf-8", errors="replace").strip(),
+            stderr_bytes.decode("utf-8", errors="replace").strip(),
+        )
+
+    async def _run_adb_command_raw(
+        self,
+        args: list[str],
+        timeout_seconds: float | None = None,
+        check: bool = True,
+    ) -> tuple[bytes, bytes]:
+        """Run an ADB command and return its raw stdout and stderr.
+
+        Args:
+            args: List of arguments to pass to ADB
+            timeout_seconds: Command timeout in seconds (None for no timeout)
+            check: Whether to check return code and raise exception
+
+        Returns:
+            Tuple of (stdout, stderr) as undecoded bytes
+
         Raises:
             RuntimeError: If command fails and check=True
         """
@@ -92,15 +348,13 @@ class ADBWrapper:
 
                 stdout_bytes, stderr_bytes = await process.communicate()
 
-            stdout = stdout_bytes.decode("utf-8", errors="replace").strip()
-            stderr = stderr_bytes.decode("utf-8", errors="replace").strip()
-
             if check and process.returncode != 0:
-                error_msg = f"ADB command failed with code {process.returncode}: {stderr or stdout}"
+                output = (stderr_bytes or stdout_bytes).decode("utf-8", errors="replace").strip()
+                error_msg = f"ADB command failed with code {process.returncode}: {output}"
                 logger.error(error_msg)
                 raise RuntimeError(error_msg)
 
-            return stdout, stderr
+            return stdout_bytes, stderr_bytes
 
         except TimeoutError as exc:
             logger.exception("ADB command timed out after %ss: %s", timeout_seconds, cmd_str)
@@ -126,6 +380,21 @@ class ADBWrapper:
             # For other exceptions, re-raise with more context
             raise RuntimeError(f"Failed to execute ADB command: {cmd_str}. Error: {e}") from e
 
+    @asynccontextmanager
+    async def _command_slot(self, serial: str) -> AsyncIterator[None]:
+        """Wait for a free command slot for the device, then for a free slot overall.
+
+        Args:
+            serial: Device serial number
+        """
+        device_slots = self._device_command_slots.get(serial)
+        if device_slots is None:
+            device_slots = self._device_command_slots[serial] = asyncio.Semaphore(_MAX_CONCURRENT_DEVICE_COMMANDS)
+
+        # Take the device slot first so a busy device never holds global slots while it waits
+        async with device_slots, self._command_slots:
+            yield
+
     async def _run_adb_device_command(
         self, serial: str, args: list[str], timeout_seconds: float | None = None, check: bool = True
     ) -> tuple[str, str]:
@@ -140,7 +409,25 @@ class ADBWrapper:
         Returns:
             Tuple of (stdout, stderr)
         """
-        return await self._run_adb_command(["-s", serial, *args], timeout_seconds, check)
+        async with self._command_slot(serial):
+            return await self._run_adb_command(["-s", serial, *args], timeout_seconds, check)
+
+    async def _run_adb_device_command_raw(
+        self, serial: str, args: list[str], timeout_seconds: float | None = None, check: bool = True
+    ) -> tuple[bytes, bytes]:
+        """Run an ADB command for a specific device and return its raw output.
+
+        Args:
+            serial: Device serial number
+            args: List of arguments to pass to ADB
+            timeout_seconds: Command timeout in seconds
+            check: Whether to check return code
+
+        Returns:
+            Tuple of (stdout, stderr) as undecoded bytes
+        """
+        async with self._command_slot(serial):
+            return await self._run_adb_command_raw(["-s", serial, *args], timeout_seconds, check)
 
     async def connect_device_tcp(self, host: str, port: int = 5555) -> str:
         """Connect to a device over TCP/IP.
@@ -225,6 +512,9 @@ class ADBWrapper:
 
             # Clear cache
             self._devices_cache = []
+            self._prop_cache.pop(serial, None)
+            self._last_ok.pop(serial, None)
+            await self.close_persistent_shell(serial)
 
             if "disconnected" in stdout.lower():
                 logger.info("Disconnected from %s", serial)
@@ -239,6 +529,46 @@ class ADBWrapper:
             logger.exception("Error disconnecting from %s: %s", serial, e)
             return False
 
+    async def _add_device_details(self, device_info: dict[str, str]) -> None:
+        """Add model and Android version details to a device info dictionary.
+
+        Args:
+            device_info: Basic device info containing at least the serial
+        """
+        serial = device_info["serial"]
+        props = self._prop_cache.get(serial, {})
+        if "ro.product.model" not in props or "ro.build.version.release" not in props:
+            try:
+                # Read all properties in one round-trip, directly rather than through
+                # get_device_properties to avoid potential infinite recursion
+                props_stdout, _ = await self._run_adb_device_command(serial, ["shell", "getprop"], check=False)
+            except (TimeoutError, RuntimeError, OSError) as e:
+                # Continue even if we can't get the properties
+                logger.debug("Could not get device properties for %s: %s", serial, e)
+                return
+
+            props = {key: value for key, value in _parse_getprop(props_stdout).items() if key.startswith("ro.")}
+            if props:
+                self._prop_cache[serial] = props
+
+        if props.get("ro.product.model"):
+            device_info["model"] = props["ro.product.model"]
+        if props.get("ro.build.version.release"):
+            device_info["android_version"] = props["ro.build.version.release"]
+
+    async def _forget_missing_devices(self, listed: set[str]) -> None:
+        """Drop per-device state for devices that went away, since they may come back rebooted.
+
+        Args:
+            listed: Serials of the devices that are still connected.
+        """
+        for serial in self._prop_cache.keys() - listed:
+            del self._prop_cache[serial]
+        for serial in self._last_ok.keys() - listed:
+            del self._last_ok[serial]
+        for serial in self._shells.keys() - listed:
+            await self.close_persistent_shell(serial)
+
     async def get_devices(self) -> list[dict[str, str]]:
         """Get a list of connected devices.
 
@@ -254,6 +584,7 @@ class ADBWrapper:
             lines = stdout.splitlines()
             if len(lines) <= 1:
                 logger.info("No devices connected")
+                await self._forget_missing_devices(set())
                 return []
 
             for line in lines[1:]:  # Skip the "List of devices attached" header
@@ -279,35 +610,20 @@ class ADBWrapper:
                 }
 
                 # Extract model from device info line if available
-                model_match = re.search(r"model:(\S+)", line)
+                model_match = _DEVICE_MODEL_RE.search(line)
                 if model_match:
                     device_info["model"] = model_match.group(1)
 
-                # Get more device details if we have a connected device
-                if status == "device":
-                    try:
-                        # Get additional device properties directly without using get_device_property
-                        # to avoid potential infinite recursion
-                        model_stdout, _ = await self._run_adb_device_command(
-                            serial, ["shell", "getprop ro.product.model"], check=False
-                        )
-                        if model_stdout.strip():
-                            device_info["model"] = model_stdout.strip()
-
-                        version_stdout, _ = await self._run_adb_device_command(
-                            serial, ["shell", "getprop ro.build.version.release"], check=False
-                        )
-                        if version_stdout.strip():
-                            device_info["android_version"] = version_stdout.strip()
-                    except (TimeoutError, RuntimeError, OSError) as e:
-                        # Continue even if we can't get all properties
-                        logger.debug("Could not get all device properties for %s: %s", serial, e)
-
                 result.append(device_info)
 
+            await self._forget_missing_devices({device_info["serial"] for device_info in result})
+
+            # Fetch device details concurrently so listing waits on the slowest device, not the sum
+            await asyncio.gather(*(self._add_device_details(device_info) for device_info in result))
+
             # Update cache
             self._devices_cache = result
-            self._cache_time = asyncio.get_event_loop().time()
+            self._cache_time = time.monotonic()
 
             return result
 
@@ -329,6 +645,53 @@ class ADBWrapper:
                 return self._devices_cache
             return []
 
+    def _recently_ok(self, serial: str) -> bool:
+        """Check whether a command succeeded on the device within the last few seconds."""
+        last_ok = self._last_ok.get(serial)
+        return last_ok is not None and time.monotonic() - last_ok < _CONNECTED_TTL
+
+    async def _ensure_connected(self, serial: str) -> None:
+        """Make sure a device is connected, skipping the device scan if it answered recently.
+
+        Args:
+            serial: The device serial number.
+
+        Raises:
+            ValueError: If device is not connected.
+        """
+        if self._recently_ok(serial):
+            return
+
+        devices = await self.get_devices()
+        if not any(d["serial"] == serial for d in devices):
+            raise ValueError(f"Device {serial} not connected")
+        self._last_ok[serial] = time.monotonic()
+
+    async def _check_shell_target(self, serial: str) -> None:
+        """Check that a device is connected before running a shell command on it.
+
+        Args:
+            serial: The device serial number.
+
+        Raises:
+            ValueError: If device is not connected.
+        """
+        # Skip the connection check entirely if the device answered recently
+        if self._recently_ok(serial):
+            return
+
+        # Use cached device list to avoid infinite recursion
+        # Only fetch devices if cache is empty
+        if not self._devices_cache:
+            # Direct ADB command to check if device exists without recursion
+            stdout, _ = await self._run_adb_command(["devices"], check=False)
+            if serial not in stdout:
+                raise ValueError(f"Device {serial} not connected")
+        else:
+            device_serials = [d["serial"] for d in self._devices_cache]
+            if serial not in device_serials:
+                raise ValueError(f"Device {serial} not connected")
+
     async def shell(self, serial: str, command: str) -> str:
         """Run a shell command on the device.
 
@@ -344,20 +707,11 @@ class ADBWrapper:
             RuntimeError: If command execution fails.
         """
         try:
-            # Use cached device list to avoid infinite recursion
-            # Only fetch devices if cache is empty
-            if not self._devices_cache:
-                # Direct ADB command to check if device exists without recursion
-                stdout, _ = await self._run_adb_command(["devices"], check=False)
-                if serial not in stdout:
-                    raise ValueError(f"Device {serial} not connected")
-            else:
-                device_serials = [d["serial"] for d in self._devices_cache]
-                if serial not in device_serials:
-                    raise ValueError(f"Device {serial} not connected")
+            await self._check_shell_target(serial)
 
             # Execute shell command
             stdout, _ = await self._run_adb_device_command(serial, ["shell", command])
+            self._last_ok[serial] = time.monotonic()
 
             return stdout
 
@@ -368,6 +722,108 @@ class ADBWrapper:
             logger.exception("Error executing command on %s: %s", serial, e)
             raise RuntimeError(f"Command execution failed: {e!s}") from e
 
+    async def shell_bytes(self, serial: str, command: str) -> bytes:
+        """Run a shell command on the device and return its raw output.
+
+        Uses `adb exec-out`, which passes stdout through untouched, so binary
+        output such as `screencap -p` arrives without decoding or line-ending
+        translation.
+
+        Args:
+            serial: The device serial number.
+            command: The shell command to run.
+
+        Returns:
+            The command output as bytes.
+
+        Raises:
+            ValueError: If device is not connected.
+            RuntimeError: If command execution fails.
+        """
+        try:
+            await self._check_shell_target(serial)
+
+            stdout, _ = await self._run_adb_device_command_raw(serial, ["exec-out", command])
+            self._last_ok[serial] = time.monotonic()
+
+            return stdout
+
+        except ValueError:
+            raise  # Re-raise ValueError for not connected
+
+        except Exception as e:
+            logger.exception("Error executing command on %s: %s", serial, e)
+            raise RuntimeError(f"Command execution failed: {e!s}") from e
+
+    async def open_persistent_shell(self, serial: str) -> PersistentShell:
+        """Get the shared persistent shell session for a device, starting it if needed.
+
+        The session stays open until the device is disconnected or rebooted, or
+        close_persistent_shell() is called.
+
+        Args:
+            serial: The device serial number.
+
+        Returns:
+            A running PersistentShell for the device.
+
+        Raises:
+            ValueError: If device is not connected.
+        """
+        # Serialize session creation so concurrent callers can't each start (and leak) a shell
+        async with self._shell_locks.setdefault(serial, asyncio.Lock()):
+            shell = self._shells.get(serial)
+            if shell is None or shell.closed:
+                await self._check_shell_target(serial)
+                shell = PersistentShell(self.adb_path, serial)
+                await shell.start()
+                self._shells[serial] = shell
+            return shell
+
+    async def session_shell(self, serial: str, command: str) -> str:
+        """Run a shell command on the device's persistent shell session.
+
+        Cheaper than shell() for small, frequent commands, since it reuses one
+        adb connection instead of starting an adb process per command. Stderr
+        is folded into the output.
+
+        Args:
+            serial: The device serial number.
+            command: The shell command to run.
+
+        Returns:
+            The command output as a string.
+
+        Raises:
+            ValueError: If device is not connected.
+            RuntimeError: If command execution fails or exits non-zero.
+        """
+        try:
+            shell = await self.open_persistent_shell(serial)
+            output, status = await shell.run(command)
+            if status != 0:
+                raise RuntimeError(f"exit status {status}: {output}")
+            self._last_ok[serial] = time.monotonic()
+
+            return output
+
+        except ValueError:
+            raise  # Re-raise ValueError for not connected
+
+        except Exception as e:
+            logger.exception("Error executing command on %s: %s", serial, e)
+            raise RuntimeError(f"Command execution failed: {e!s}") from e
+
+    async def close_persistent_shell(self, serial: str) -> None:
+        """Close the shared persistent shell session for a device, if one is open.
+
+        Args:
+            serial: The device serial number.
+        """
+        shell = self._shells.pop(serial, None)
+        if shell is not None:
+            await shell.close()
+
     async def get_device_properties(self, serial: str) -> dict[str, str]:
         """Get all properties from a device.
 
@@ -383,14 +839,10 @@ class ADBWrapper:
         # Direct shell command without checking device list to avoid recursion
         try:
             result = await self.shell(serial, "getprop")
+            properties = _parse_getprop(result)
 
-            # Parse the getprop output into a dictionary
-            properties = {}
-            for line in result.splitlines():
-                match = re.match(r"\[(.+?)\]: \[(.+?)\]", line)
-                if match:
-                    key, value = match.groups()
-                    properties[key] = value
+            # Refresh the read-only property cache from the full dump
+            self._prop_cache[serial] = {key: value for key, value in properties.items() if key.startswith("ro.")}
 
             return properties
         except ValueError:
@@ -416,16 +868,25 @@ class ADBWrapper:
         Raises:
             ValueError: If device is not connected.
         """
+        # Read-only properties are served from cache when available
+        is_read_only = prop_name.startswith("ro.")
+        if is_read_only:
+            cached = self._prop_cache.get(serial, {}).get(prop_name)
+            if cached is not None:
+                return cached
+
         try:
             # Direct shell command to avoid potential recursion
             stdout, _ = await self._run_adb_device_command(serial, ["shell", f"getprop {prop_name}"], check=False)
-            return stdout.strip() if stdout else None
         except (RuntimeError, OSError, TimeoutError) as e:
             logger.exception("System error getting property %s from %s: %s", prop_name, serial, e)
             return None
-        except Exception as e:
-            logger.exception("Error getting property %s from %s: %s", prop_name, serial, e)
-            return None
+
+        # getprop prints an empty line rather than failing for unknown properties
+        value = stdout.strip() or None
+        if is_read_only and value:
+            self._prop_cache.setdefault(serial, {})[prop_name] = value
+        return value
 
     async def install_app(
         self, serial: str, apk_path: str, reinstall: bool = False, grant_permissions: bool = True
@@ -444,15 +905,13 @@ class ADBWrapper:
         Raises:
             ValueError: If device is not connected or APK doesn't exist.
         """
-        if not os.path.exists(apk_path):
-            raise ValueError(f"APK file not found: {apk_path}")
+        try:
+            apk_size = os.stat(apk_path).st_size
+        except OSError as e:
+            raise ValueError(f"APK file not found: {apk_path}") from e
 
         # Check if device is connected
-        devices = await self.get_devices()
-        device_serials = [d["serial"] for d in devices]
-
-        if serial not in device_serials:
-            raise ValueError(f"Device {serial} not connected")
+        await self._ensure_connected(serial)
 
         # Build install command args
         install_args = ["install"]
@@ -464,6 +923,7 @@ class ADBWrapper:
 
         # Execute installation
         try:
+            logger.info("Installing %s (%d bytes) on %s", apk_path, apk_size, serial)
             stdout, stderr = await self._run_adb_device_command(
                 serial,
                 install_args,
@@ -492,19 +952,18 @@ class ADBWrapper:
         Raises:
             ValueError: If device is not connected or local file doesn't exist.
         """
-        if not os.path.exists(local_path):
-            raise ValueError(f"Local file not found: {local_path}")
+        # Stat the file rather than reading it; adb streams the contents itself
+        try:
+            file_size = os.stat(local_path).st_size
+        except OSError as e:
+            raise ValueError(f"Local file not found: {local_path}") from e
 
         # Check if device is connected
-        devices = await self.get_devices()
-        device_serials = [d["serial"] for d in devices]
-
-        if serial not in device_serials:
-            raise ValueError(f"Device {serial} not connected")
+        await self._ensure_connected(serial)
 
         try:
             # Execute push command
-            logger.info("Pushing %s to %s on %s", local_path, device_path, serial)
+            logger.info("Pushing %s (%d bytes) to %s on %s", local_path, file_size, device_path, serial)
             _stdout, _stderr = await self._run_adb_device_command(
                 serial,
                 ["push", local_path, device_path],
@@ -532,17 +991,13 @@ class ADBWrapper:
             ValueError: If device is not connected.
         """
         # Check if device is connected
-        devices = await self.get_devices()
-        device_serials = [d["serial"] for d in devices]
-
-        if serial not in device_serials:
-            raise ValueError(f"Device {serial} not connected")
+        await self._ensure_connected(serial)
 
         try:
             # Create directory if it doesn't exist
             local_dir = os.path.dirname(local_path)
-            if local_dir and not os.path.exists(local_dir):
-                os.makedirs(local_dir)
+            if local_dir:
+                os.makedirs(local_dir, exist_ok=True)
 
             # Execute pull command
             logger.info("Pulling %s from %s to %s", device_path, serial, local_path)
@@ -572,16 +1027,11 @@ class ADBWrapper:
             ValueError: If device is not connected or mode is invalid.
         """
         # Check if device is connected
-        devices = await self.get_devices()
-        device_serials = [d["serial"] for d in devices]
-
-        if serial not in device_serials:
-            raise ValueError(f"Device {serial} not connected")
+        await self._ensure_connected(serial)
 
         # Validate reboot mode
-        valid_modes = ["normal", "recovery", "bootloader"]
-        if mode not in valid_modes:
-            raise ValueError(f"Invalid reboot mode. Must be one of: {', '.join(valid_modes)}")
+        if mode not in _VALID_REBOOT_MODES:
+            raise ValueError(f"Invalid reboot mode. Must be one of: {', '.join(sorted(_VALID_REBOOT_MODES))}")
 
         try:
             # Execute reboot command
@@ -595,6 +1045,9 @@ class ADBWrapper:
             # Device will disconnect after reboot
             # Clear our device cache
             self._devices_cache = [d for d in self._devices_cache if d["serial"] != serial]
+            self._prop_cache.pop(serial, None)
+            self._last_ok.pop(serial, None)
+            await self.close_persistent_shell(serial)
 
             return f"Device {serial} rebooting into {mode} mode"
 
@@ -602,6 +1055,29 @@ class ADBWrapper:
             logger.exception("Error rebooting %s: %s", serial, e)
             raise RuntimeError(f"Reboot failed: {e!s}") from e
 
+    async def screencap(self, serial: str) -> bytes:
+        """Capture a screenshot from the device as PNG data.
+
+        Args:
+            serial: The device serial number.
+
+        Returns:
+            The screenshot as PNG bytes.
+
+        Raises:
+            ValueError: If device is not connected.
+            RuntimeError: If the device doesn't return a PNG image.
+        """
+        # Stream the PNG straight from screencap over exec-out, with no temp file on the device
+        png_data = await self.shell_bytes(serial, "screencap -p")
+
+        # exec-out reports no exit status, so a failed capture shows up as error text instead of an image
+        if not png_data.startswith(_PNG_SIGNATURE):
+            message = png_data[:200].decode("utf-8", errors="replace").strip() or "no data returned"
+            raise RuntimeError(f"screencap did not return a PNG image: {message}")
+
+        return png_data
+
     async def capture_screenshot(self, serial: str, local_path: str | None = None) -> str:
         """Capture a screenshot from the device.
 
@@ -616,32 +1092,22 @@ class ADBWrapper:
             ValueError: If device is not connected.
         """
         # Check if device is connected
-        devices = await self.get_devices()
-        device_serials = [d["serial"] for d in devices]
-
-        if serial not in device_serials:
-            raise ValueError(f"Device {serial} not connected")
+        await self._ensure_connected(serial)
 
         # Generate default path if not provided
         if not local_path:
-            timestamp = asyncio.get_event_loop().time()
-            local_path = f"screenshot_{serial.replace(':', '_')}_{int(timestamp)}.png"
-
-        # Temp path on device - use /sdcard for better compatibility
-        timestamp = int(time.time())
-        random_suffix = "".join(random.choices(string.ascii_lowercase + string.digits, k=8))  # noqa: S311
-        device_path = f"/sdcard/screenshot_{timestamp}_{random_suffix}.png"
+            local_path = f"screenshot_{serial.replace(':', '_')}_{time.monotonic_ns()}.png"
 
         try:
-            # Take screenshot using screencap command
             logger.info("Taking screenshot on %s", serial)
-            await self.shell(serial, f"screencap -p {device_path}")
+            png_data = await self.screencap(serial)
 
-            # Pull screenshot to local machine
-            await self.pull_file(serial, device_path, local_path)
+            local_dir = os.path.dirname(local_path)
+            if local_dir:
+                os.makedirs(local_dir, exist_ok=True)
 
-            # Clean up on device
-            await self.shell(serial, f"rm {device_path}")
+            async with aiofiles.open(local_path, "wb") as f:
+                await f.write(png_data)
 
             return local_path
 
@@ -660,9 +1126,6 @@ class ADBWrapper:
         Returns:
             List of dicts containing basic package info (package name and installation path)
         """
-        cmd = ["pm", "list", "packages", "-f"]
-        if not include_system_apps:
-            cmd.append("-3")
-
-        stdout = await self.shell(serial, " ".join(cmd))
+        cmd = LIST_ALL_PACKAGES_CMD if include_system_apps else LIST_THIRD_PARTY_PACKAGES_CMD
+        stdout = await self.shell(serial, cmd)
         return parse_package_list(stdout)
@@ -9,19 +9,86 @@ through ADB. It defines two primary classes:
 2. DeviceManager: Manages device discovery and connection.
 """
 
+import asyncio
+from collections import Counter
 import contextlib
+from dataclasses import dataclass
+import io
 import os
 import re
+import shlex
 import tempfile
+import time
 from urllib.parse import unquote
 
-import aiofiles
+from PIL import Image
 
 from droidmind.adb import ADBWrapper
 from droidmind.log import logger
-from droidmind.packages import parse_package_list
+from droidmind.packages import LIST_ALL_PACKAGES_CMD, LIST_THIRD_PARTY_PACKAGES_CMD, parse_package_list
 from droidmind.security import log_command_execution, sanitize_shell_command
 
+# Fields extracted from `dumpsys package <name>` output
+_VERSION_NAME_RE = re.compile(r"versionName=([^\s]+)")
+_CODE_PATH_RE = re.compile(r"codePath=([^\s]+)")
+_FIRST_INSTALL_RE = re.compile(r"firstInstallTime=([^\s]+)")
+_USER_ID_RE = re.compile(r"userId=(\d+)")
+_APP_LABEL_RE = re.compile(r"application-label(?:-[^:]+)?:\s*'?([^'\r\n]+)'?")
+
+# Printed ahead of each package's lines by get_app_labels' batched lookup
+_APP_LABEL_PACKAGE_MARKER = "PKG:"
+
+# Shell commands that are likely to produce large output
+_LARGE_OUTPUT_RE = re.compile(
+    r"\bcat\s+"  # cat command
+    r"|\bgrep\s+.+\s+-r"  # recursive grep
+    r"|\bfind\s+.+"  # find commands
+    r"|\bls\s+-[RalL]"  # recursive ls or with many options
+    r"|\bdumpsys\b"  # dumpsys commands
+    r"|\bpm\s+list\b"  # package list
+)
+
+# Shell metacharacters stripped from logcat filter expressions
+_FILTER_SANITIZE_RE = re.compile(r"[;&|<>$]")
+
+# Level letter of a logcat line in threadtime format ("10-15 12:00:00.000  123  456 I Tag: ...", logcat's
+# default) or brief format ("I/Tag(  123): ...")
+_LOG_LEVEL_RE = re.compile(r"^(?:\S+ \S+\s+\d+\s+\d+ (?=[VDIWEF] )|(?=[VDIWEF]/))([VDIWEF])", re.MULTILINE)
+
+# Display names of logcat levels, in summary table order
+_LEVEL_NAMES = {"V": "Verbose", "D": "Debug", "I": "Info", "W": "Warning", "E": "Error", "F": "Fatal"}
+
+_IP_RE = re.compile(r"^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$")
+
+# How long DeviceManager reuses a device listing before asking adb again, in seconds
+_DEVICES_TTL = 1.0
+
+# Printed by read_file's device-side size check in place of the content of oversized files
+_FILE_TOO_LARGE_MARKER = "__DROIDMIND_FILE_TOO_LARGE__:"
+
+
+def png_to_jpeg(png_data: bytes, quality: int, max_dim: int | None = None) -> bytes:
+    """Re-encode PNG image data as JPEG, optionally shrinking it to fit within max_dim pixels."""
+    buffer = io.BytesIO()
+    with Image.open(io.BytesIO(png_data)) as img:
+        if max_dim is not None:
+            img.thumbnail((max_dim, max_dim), Image.Resampling.BILINEAR)
+        # JPEG has no alpha channel or palette, so convert anything that isn't already RGB
+        converted_img = img.convert("RGB") if img.mode != "RGB" else img
+        converted_img.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+@dataclass(frozen=True)
+class DeviceSnapshot:
+    """Commonly used device properties, read from a single getprop call."""
+
+    model: str
+    brand: str
+    android_version: str
+    sdk_level: str
+    build_number: str
+
 
 # pylint: disable=too-many-public-methods
 class Device:
@@ -42,6 +109,8 @@ class Device:
         self._adb = adb
 
         self._properties_cache: dict[str, str] = {}
+        # In-flight property fetch shared by concurrent get_properties() callers
+        self._properties_task: asyncio.Task[dict[str, str]] | None = None
 
     @property
     def serial(self) -> str:
@@ -54,10 +123,35 @@ class Device:
         Returns:
             Dictionary of device properties
         """
-        if not self._properties_cache:
-            self._properties_cache = await self._adb.get_device_properties(self._serial)
+        if self._properties_cache:
+            return self._properties_cache
+
+        task = self._properties_task
+        if task is None:
+            task = self._properties_task = asyncio.create_task(self._adb.get_device_properties(self._serial))
+        try:
+            # Shield the shared fetch so one cancelled caller doesn't cancel it for the others
+            self._properties_cache = await asyncio.shield(task)
+        finally:
+            if self._properties_task is task and task.done():
+                self._properties_task = None
         return self._properties_cache
 
+    async def snapshot(self) -> DeviceSnapshot:
+        """Get the commonly used device properties in one go.
+
+        Returns:
+            DeviceSnapshot with model, brand, Android version, SDK level and build number
+        """
+        props = await self.get_properties()
+        return DeviceSnapshot(
+            model=props.get("ro.product.model", "Unknown"),
+            brand=props.get("ro.product.brand", "Unknown"),
+            android_version=props.get("ro.build.version.release", "Unknown"),
+            sdk_level=props.get("ro.build.version.sdk", "Unknown"),
+            build_number=props.get("ro.build.display.id", "Unknown"),
+        )
+
     async def get_property(self, name: str) -> str:
         """Get a specific device property.
 
@@ -119,7 +213,7 @@ class Device:
         # Apply filter if provided
         if filter_expr and filter_expr.strip():
             # Sanitize filter expression to prevent command injection
-            safe_filter = re.sub(r"[;&|<>$]", "", filter_expr)
+            safe_filter = _FILTER_SANITIZE_RE.sub("", filter_expr)
             cmd += f" {safe_filter}"
 
         # Get raw logcat
@@ -128,21 +222,8 @@ class Device:
         # If the output is extremely large, summarize by log level
         if len(output) > 50000:
             # Still return the full output, but add a summary at the beginning
-            log_levels = {
-                "V": 0,  # Verbose
-                "D": 0,  # Debug
-                "I": 0,  # Info
-                "W": 0,  # Warning
-                "E": 0,  # Error
-                "F": 0,  # Fatal
-            }
-
-            # Count occurrences of each log level
-            for line in output.splitlines():
-                for level in log_levels:
-                    if f"/{level} " in line:
-                        log_levels[level] += 1
-                        break
+            # Count occurrences of each log level in a single pass
+            log_levels = Counter(_LOG_LEVEL_RE.findall(output))
 
             # Create a summary
             total_lines = sum(log_levels.values())
@@ -154,11 +235,8 @@ class Device:
                 "|-------|-------|------------|",
             ]
 
-            for level, count in log_levels.items():
-                level_name = {"V": "Verbose", "D": "Debug", "I": "Info", "W": "Warning", "E": "Error", "F": "Fatal"}[
-                    level
-                ]
-
+            for level, level_name in _LEVEL_NAMES.items():
+                count = log_levels[level]
                 percentage = (count / total_lines * 100) if total_lines > 0 else 0
                 summary_lines.append(f"| {level_name} | {count} | {percentage:.1f}% |")
 
@@ -170,11 +248,12 @@ class Device:
                     "",
                     "## Full Logcat Output",
                     "",
+                    output,
                 ]
             )
 
-            # Add summary to beginning of output
-            output = "\n".join(summary_lines) + "\n" + output
+            # Add summary to beginning of output, copying the full output only once
+            output = "\n".join(summary_lines)
 
         return output
 
@@ -187,7 +266,7 @@ class Device:
         Returns:
             Directory listing
         """
-        return await self._adb.shell(self._serial, f"ls -la {path}")
+        return await self._adb.session_shell(self._serial, f"ls -la {path}")
 
     async def run_shell(self, command: str, max_lines: int | None = 1000, max_size: int | None = 100000) -> str:
         """Run a shell command on the device.
@@ -219,16 +298,7 @@ class Device:
             max_size = None
 
         # Check if the command is likely to produce large output
-        large_output_patterns = [
-            r"\bcat\s+",  # cat command
-            r"\bgrep\s+.+\s+-r",  # recursive grep
-            r"\bfind\s+.+",  # find commands
-            r"\bls\s+-[RalL]",  # recursive ls or with many options
-            r"\bdumpsys\b",  # dumpsys commands
-            r"\bpm\s+list\b",  # package list
-        ]
-
-        is_large_output_likely = any(re.search(pattern, command) for pattern in large_output_patterns)
+        is_large_output_likely = _LARGE_OUTPUT_RE.search(command) is not None
 
         # Add automatic paging for commands likely to produce large output
         if is_large_output_likely and not command.endswith(("| head", "| tail", "| grep", "| wc")):
@@ -253,32 +323,36 @@ class Device:
         if max_size and len(output) > max_size:
             output_lines = output.splitlines()
             total_lines = len(output_lines)
+            total_size = len(output)
 
             if total_lines <= 10:
                 # If we have very few lines but huge content (like a binary dump)
                 # Just truncate with a message
-                output = output[:max_size] + f"\n\n... Output truncated! Total size: {len(output)} characters."
+                output = f"{output[:max_size]}\n\n... Output truncated! Total size: {total_size} characters."
             else:
                 # Calculate how many lines to keep from beginning and end
                 keep_lines = min(max_lines or total_lines, total_lines)
                 keep_from_start = keep_lines // 2
                 keep_from_end = keep_lines - keep_from_start
 
-                truncated_output = "\n".join(output_lines[:keep_from_start])
-                truncated_output += f"\n\n... {total_lines - keep_from_start - keep_from_end} lines omitted ...\n\n"
-                truncated_output += "\n".join(output_lines[-keep_from_end:])
-
-                # Add summary info
-                truncated_output += f"\n\n[Output truncated: {len(output)} chars, {total_lines} lines]"
-                output = truncated_output
+                # Assemble the head, tail and summary info in one allocation
+                output = "".join(
+                    (
+                        "\n".join(output_lines[:keep_from_start]),
+                        f"\n\n... {total_lines - keep_from_start - keep_from_end} lines omitted ...\n\n",
+                        "\n".join(output_lines[-keep_from_end:]),
+                        f"\n\n[Output truncated: {total_size} chars, {total_lines} lines]",
+                    )
+                )
 
         # Add warning for large outputs that were truncated
+        output_size = len(output)
         original_line_count = output.count("\n") + 1
-        if original_line_count >= (max_lines or 1000) or (max_size and len(output) >= max_size):
+        if original_line_count >= (max_lines or 1000) or (max_size and output_size >= max_size):
             # Calculate size info for summary
-            size_in_kb = len(output) / 1024
+            size_in_kb = output_size / 1024
             if size_in_kb < 1:
-                size_info = f"{len(output)} bytes"
+                size_info = f"{output_size} bytes"
             else:
                 size_info = f"{size_in_kb:.1f} KB"
 
@@ -289,6 +363,29 @@ class Device:
 
         return output
 
+    async def run_shell_batch(self, commands: list[str]) -> list[str]:
+        """Run several shell commands on the device in a single round-trip.
+
+        The commands run in order on the device's persistent shell session, so
+        a sequence of small commands costs one exchange instead of one adb
+        invocation each. Output is not truncated as it is by run_shell.
+
+        Args:
+            commands: Shell commands to run
+
+        Returns:
+            The output of each command, in order
+
+        Raises:
+            ValueError: If a command fails security validation
+        """
+        # Each command is logged by the shell session as it's sent
+        sanitized_commands = [sanitize_shell_command(command) for command in commands]
+
+        shell = await self._adb.open_persistent_shell(self._serial)
+        results = await shell.run_batch(sanitized_commands)
+        return [output for output, _ in results]
+
     async def reboot(self, mode: str = "normal") -> str:
         """Reboot the device.
 
@@ -306,32 +403,29 @@ class Device:
         Returns:
             Screenshot data as bytes
         """
-        # Create a temporary file for the screenshot
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp:
-            screenshot_path = temp.name
-
         try:
-            # Use the ADB wrapper to take a screenshot
-            local_path = await self._adb.capture_screenshot(self._serial, screenshot_path)
+            # Stream the PNG straight from the device without a temporary file
+            return await self._adb.screencap(self._serial)
+        except Exception as e:
+            logger.exception("Error capturing screenshot: %s", e)
+            raise
 
-            # Read the screenshot file
-            async with aiofiles.open(local_path, "rb") as f:
-                screenshot_data = await f.read()
+    async def take_screenshot_preview(self, max_dim: int = 720, quality: int = 60) -> bytes:
+        """Take a downscaled JPEG screenshot of the device for previews.
 
-            # Clean up the temporary file
-            try:
-                os.unlink(local_path)
-            except OSError:
-                logger.warning("Failed to remove temporary screenshot file: %s", local_path)
+        The image is resized and encoded in a worker thread, so the event loop
+        keeps serving other devices meanwhile. Use take_screenshot for
+        pixel-exact PNG output.
 
-            return screenshot_data
+        Args:
+            max_dim: Maximum width and height of the preview in pixels
+            quality: JPEG quality (1-100)
 
-        except Exception as e:
-            logger.exception("Error capturing screenshot: %s", e)
-            # Clean up in case of error
-            with contextlib.suppress(OSError):
-                os.unlink(screenshot_path)
-            raise
+        Returns:
+            Preview image data as JPEG bytes
+        """
+        png_data = await self.take_screenshot()
+        return await asyncio.to_thread(png_to_jpeg, png_data, quality, max_dim)
 
     async def install_app(self, apk_path: str, reinstall: bool = False, grant_permissions: bool = True) -> str:
         """Install an APK on the device.
@@ -359,12 +453,8 @@ class Device:
         """
         log_command_execution(f"Uninstalling package {package} from {self._serial}")
 
-        cmd = ["pm", "uninstall"]
-        if keep_data:
-            cmd.append("-k")
-        cmd.append(package)
-
-        result = await self.run_shell(" ".join(cmd))
+        keep_flag = "-k " if keep_data else ""
+        result = await self.run_shell(f"pm uninstall {keep_flag}{shlex.quote(package)}")
         return result.strip()
 
     async def start_app(self, package: str, activity: str = "") -> str:
@@ -448,14 +538,44 @@ class Device:
         Returns:
             List of dicts with package information
         """
-        cmd = ["pm", "list", "packages", "-f"]  # -f to get APK paths
-        if not include_system_apps:
-            cmd.append("-3")  # Only third-party apps
-
-        result = await self.run_shell(" ".join(cmd))
+        cmd = LIST_ALL_PACKAGES_CMD if include_system_apps else LIST_THIRD_PARTY_PACKAGES_CMD
+        result = await self.run_shell(cmd)
 
         return parse_package_list(result)
 
+    async def get_app_labels(self, packages: list[str]) -> dict[str, str]:
+        """Get the human-friendly labels of several installed apps in one round-trip.
+
+        Labels are read best-effort from `dumpsys package`, whose format varies
+        by Android version and vendor.
+
+        Args:
+            packages: Package names to look up
+
+        Returns:
+            Dictionary mapping package names to labels; packages without a label are left out
+        """
+        if not packages:
+            return {}
+
+        # Look up every package in one shell loop, marking where each package's output starts
+        quoted_packages = " ".join(shlex.quote(package) for package in packages)
+        cmd = (
+            f'for p in {quoted_packages}; do echo "{_APP_LABEL_PACKAGE_MARKER}$p"; '
+            'dumpsys package "$p" | grep application-label | head -n 1; done'
+        )
+        output = await self._adb.shell(self._serial, cmd)
+
+        labels: dict[str, str] = {}
+        package = None
+        for line in output.splitlines():
+            if line.startswith(_APP_LABEL_PACKAGE_MARKER):
+                package = line.removeprefix(_APP_LABEL_PACKAGE_MARKER).strip()
+            elif package and package not in labels and (match := _APP_LABEL_RE.search(line)):
+                labels[package] = match.group(1).strip()
+
+        return labels
+
     async def get_app_info(self, package: str) -> dict[str, str]:
         """Get detailed information about an installed app.
         This method provides comprehensive details about a specific package.
@@ -483,22 +603,22 @@ class Device:
         info = {"raw_dump": result}
 
         # Extract version info
-        version_match = re.search(r"versionName=([^\s]+)", result)
+        version_match = _VERSION_NAME_RE.search(result)
         if version_match:
             info["version"] = version_match.group(1)
 
         # Extract installation path
-        path_match = re.search(r"codePath=([^\s]+)", result)
+        path_match = _CODE_PATH_RE.search(result)
         if path_match:
             info["install_path"] = path_match.group(1)
 
         # Extract first install time
-        time_match = re.search(r"firstInstallTime=([^\s]+)", result)
+        time_match = _FIRST_INSTALL_RE.search(result)
         if time_match:
             info["first_install"] = time_match.group(1)
 
         # Extract user ID
-        uid_match = re.search(r"userId=(\d+)", result)
+        uid_match = _USER_ID_RE.search(result)
         if uid_match:
             info["user_id"] = uid_match.group(1)
 
@@ -554,14 +674,9 @@ class Device:
         Returns:
             Result message
         """
-        # For directories, use rm -rf, for files use rm
-        # First check if it's a directory
-        result = await self._adb.shell(self._serial, f"[ -d '{device_path}' ] && echo 'directory' || echo 'file'")
-
-        if result.strip() == "directory":
-            cmd = f"rm -rf '{device_path}'"
-        else:
-            cmd = f"rm '{device_path}'"
+        # For directories, use rm -rf, for files use rm; decided on the device in one round-trip
+        quoted_path = shlex.quote(device_path)
+        cmd = f"if [ -d {quoted_path} ]; then rm -rf {quoted_path}; else rm {quoted_path}; fi"
 
         await self._adb.shell(self._serial, cmd)
         return f"Successfully deleted {device_path}"
@@ -576,7 +691,7 @@ class Device:
             Result message
         """
         # Use mkdir -p to create parent directories if needed
-        await self._adb.shell(self._serial, f"mkdir -p '{device_path}'")
+        await self._adb.shell(self._serial, f"mkdir -p {shlex.quote(device_path)}")
         return f"Successfully created directory {device_path}"
 
     async def file_exists(self, device_path: str) -> bool:
@@ -589,7 +704,7 @@ class Device:
             True if the file exists, False otherwise
         """
         # Use test -e to check if file exists, return exit code
-        result = await self._adb.shell(self._serial, f"[ -e '{device_path}' ] && echo 0 || echo 1")
+        result = await self._adb.session_shell(self._serial, f"[ -e {shlex.quote(device_path)} ] && echo 0 || echo 1")
         # Convert to boolean (0 = exists, 1 = does not exist)
         return result.strip() == "0"
 
@@ -603,23 +718,27 @@ class Device:
         Returns:
             File content as string
         """
-        # Check file size first
-        size_check = await self._adb.shell(self._serial, f"wc -c '{device_path}'")
-
-        try:
-            size = int(size_check.split()[0])
-        except (ValueError, IndexError):
-            # If we can't get size, assume it's within limits
-            size = 0
-
-        if size > max_size > 0:
+        quoted_path = shlex.quote(device_path)
+        if max_size <= 0:
+            return await self._adb.shell(self._serial, f"cat {quoted_path}")
+
+        # Check the size and read the file in a single round-trip; oversized files
+        # only report their size. If the size can't be determined, assume it's within limits.
+        output = await self._adb.shell(
+            self._serial,
+            f"size=$(wc -c < {quoted_path}); "
+            f'if [ "${{size:-0}}" -gt {max_size} ]; then echo "{_FILE_TOO_LARGE_MARKER}$size"; '
+            f"else cat {quoted_path}; fi",
+        )
+
+        if output.startswith(_FILE_TOO_LARGE_MARKER):
+            size = output.removeprefix(_FILE_TOO_LARGE_MARKER).strip()
             return (
                 f"File is too large ({size} bytes) to read entirely. "
                 f"Max size is {max_size} bytes. Use pull_file instead."
             )
 
-        # Read the file
-        return await self._adb.shell(self._serial, f"cat '{device_path}'")
+        return output
 
     async def write_file(self, device_path: str, content: str) -> str:
         """Write content to a file on the device.
@@ -746,13 +865,38 @@ class DeviceManager:
         """
         self._adb = ADBWrapper(adb_path=adb_path)
 
-    async def list_devices(self) -> list[Device]:
+        # Recent device listing as (monotonic time, device info, serials)
+        self._devices_cache: tuple[float, list[dict[str, str]], frozenset[str]] | None = None
+        self._devices_lock = asyncio.Lock()
+
+    async def _get_devices_info(self) -> tuple[list[dict[str, str]], frozenset[str]]:
+        """Get the device listing, reusing one fetched within the last second.
+
+        Concurrent callers share a single `adb devices` call.
+
+        Returns:
+            Tuple of (device info dictionaries, set of serials)
+        """
+        async with self._devices_lock:
+            cached = self._devices_cache
+            if cached is not None and time.monotonic() - cached[0] < _DEVICES_TTL:
+                return cached[1], cached[2]
+
+            devices_info = await self._adb.get_devices()
+            serials = frozenset(device["serial"] for device in devices_info)
+            self._devices_cache = (time.monotonic(), devices_info, serials)
+            return devices_info, serials
+
+    async def list_devices(self, eager: bool = False) -> list[Device]:
         """List all connected Android devices.
 
+        Args:
+            eager: Whether to prefetch every device's properties concurrently
+
         Returns:
             List of Device instances
         """
-        devices_info = await self._adb.get_devices()
+        devices_info, _ = await self._get_devices_info()
 
         devices = []
         for device_info in devices_info:
@@ -760,6 +904,12 @@ class DeviceManager:
             device = Device(serial, adb=self._adb)
             devices.append(device)
 
+        if eager:
+            results = await asyncio.gather(*(device.get_properties() for device in devices), return_exceptions=True)
+            for device, result in zip(devices, results, strict=True):
+                if isinstance(result, BaseException):
+                    logger.debug("Could not prefetch properties for %s: %s", device.serial, result)
+
         return devices
 
     async def get_device(self, serial: str) -> Device | None:
@@ -774,10 +924,8 @@ class DeviceManager:
         # Decode URL-encoded serial (handles colons in TCP/IP addresses)
         decoded_serial = unquote(serial)
 
-        devices_info = await self._adb.get_devices()
-
-        device_exists = any(device["serial"] == decoded_serial for device in devices_info)
-        if not device_exists:
+        _, serials = await self._get_devices_info()
+        if decoded_serial not in serials:
             return None
 
         return Device(decoded_serial, adb=self._adb)
@@ -793,13 +941,13 @@ class DeviceManager:
             Device instance if successful, None otherwise
         """
         # Validate IP address using regex
-        ip_pattern = r"^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$"
-        if not re.match(ip_pattern, ip_address):
+        if not _IP_RE.match(ip_address):
             logger.error("Invalid IP address: %s", ip_address)
             return None
 
-        # Try to connect
+        # Try to connect, then drop the device listing it may have changed
         result = await self._adb.connect_device_tcp(ip_address, port)
+        self._devices_cache = None
 
         # Check if connection was successful
         if "connected" in result.lower() or f"{ip_address}:{port}" in result:
@@ -819,7 +967,9 @@ class DeviceManager:
         Returns:
             True if successful, False otherwise
         """
-        return await self._adb.disconnect_device(serial)
+        disconnected = await self._adb.disconnect_device(serial)
+        self._devices_cache = None
+        return disconnected
 
 
 # Module-level variable for the singleton DeviceManager instance
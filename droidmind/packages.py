@@ -1,5 +1,14 @@
 """Package management utilities for DroidMind."""
 
+import re
+
+# `pm list packages` commands; -f adds APK paths and -3 limits the list to third-party apps
+LIST_ALL_PACKAGES_CMD = "pm list packages -f"
+LIST_THIRD_PARTY_PACKAGES_CMD = "pm list packages -f -3"
+
+# Format is: "package:/path/to/base.apk=com.package.name"; the package name follows the last "="
+_PACKAGE_LINE_RE = re.compile(r"^package:(.+)=([^=\s]+)[ \t\r]*$", re.MULTILINE)
+
 
 def parse_package_list(output: str) -> list[dict[str, str]]:
     """Parse the output of 'pm list packages -f' command.
@@ -10,12 +19,4 @@ def parse_package_list(output: str) -> list[dict[str, str]]:
     Returns:
         List of dictionaries containing package info with 'package' and 'path' keys
     """
-    apps = []
-    for line in output.splitlines():
-        if line.startswith("package:"):
-            # Format is: "package:/path/to/base.apk=com.package.name"
-            path_and_pkg = line[8:]  # Strip "package:"
-            if "=" in path_and_pkg:
-                path, package = path_and_pkg.rsplit("=", 1)
-                apps.append({"package": package.strip(), "path": path.strip()})
-    return apps
+    return [{"package": match.group(2), "path": match.group(1).strip()} for match in _PACKAGE_LINE_RE.finditer(output)]
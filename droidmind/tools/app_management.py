@@ -506,19 +506,17 @@ async def _list_packages_impl(
         result_lines.append("| " + " | ".join(columns) + " |")
         result_lines.append("|" + "|".join(["-" * (len(col) + 2) for col in columns]) + "|")
 
-        async def get_app_name(package: str) -> str:
-            # Best-effort extraction from dumpsys; varies by Android version/vendor.
-            cmd = f'dumpsys package {package} | grep "application-label" | head -n 1'
-            line = await device.run_shell(cmd)
-            match = re.search(r"application-label(?:-[^:]+)?:\\s*'?([^'\\r\\n]+)'?", line)
-            return match.group(1).strip() if match else "Unknown"
+        # Fetch all app names in one batched lookup rather than one query per package
+        app_names: dict[str, str] = {}
+        if include_app_name:
+            app_names = await device.get_app_labels([app.get("package", "Unknown") for app in effective_list])
 
         for app in effective_list:
             package_name = app.get("package", "Unknown")
             apk_path = app.get("path", "Unknown")
             row: list[str] = []
             if include_app_name:
-                row.append(await get_app_name(package_name))
+                row.append(app_names.get(package_name, "Unknown"))
             row.append(f"`{package_name}`")
             if include_apk_path:
                 row.append(f"`{apk_path}`")
@@ -33,7 +33,8 @@ async def _list_devices_impl(ctx: Context) -> str:
         A formatted list of connected devices with their basic information.
     """
     try:
-        devices = await get_device_manager().list_devices()
+        # Warm every device's properties concurrently before formatting
+        devices = await get_device_manager().list_devices(eager=True)
 
         if not devices:
             return "No devices connected. Use the connect_device tool to connect to a device."
@@ -175,17 +176,13 @@ async def _device_properties_impl(serial: str, ctx: Context) -> str:
         result = f"# Device Properties for {serial}\n\n"
 
         # Add formatted sections for important properties
-        model = await device.model
-        brand = await device.brand
-        android_version = await device.android_version
-        sdk_level = await device.sdk_level
-        build_number = await device.build_number
-
-        result += f"**Model**: {model}\n"
-        result += f"**Brand**: {brand}\n"
-        result += f"**Android Version**: {android_version}\n"
-        result += f"**SDK Level**: {sdk_level}\n"
-        result += f"**Build Number**: {build_number}\n\n"
+        snapshot = await device.snapshot()
+
+        result += f"**Model**: {snapshot.model}\n"
+        result += f"**Brand**: {snapshot.brand}\n"
+        result += f"**Android Version**: {snapshot.android_version}\n"
+        result += f"**SDK Level**: {snapshot.sdk_level}\n"
+        result += f"**Build Number**: {snapshot.build_number}\n\n"
 
         # Add all properties in a code block
         result += "## All Properties\n\n```properties\n"
@@ -4,13 +4,13 @@ Media Tools - MCP tools for capturing media from Android devices.
 This module provides MCP tools for capturing screenshots and other media from Android devices.
 """
 
-import io
+import asyncio
 
 from mcp.server.fastmcp import Context, Image
-from PIL import Image as PILImage, UnidentifiedImageError
+from PIL import UnidentifiedImageError
 
 from droidmind.context import mcp
-from droidmind.devices import get_device_manager
+from droidmind.devices import get_device_manager, png_to_jpeg
 from droidmind.log import logger
 
 
@@ -51,14 +51,8 @@ async def screenshot(serial: str, ctx: Context, quality: int = 75) -> Image:
         try:
             # Convert PNG to JPEG to reduce size
             await ctx.info(f"Converting screenshot to JPEG (quality: {quality})...")
-            buffer = io.BytesIO()
-
-            # Load the PNG data into a PIL Image
-            with PILImage.open(io.BytesIO(screenshot_data)) as img:
-                # Convert to RGB (removing alpha channel if present) and save as JPEG
-                converted_img = img.convert("RGB") if img.mode == "RGBA" else img
-                converted_img.save(buffer, format="JPEG", quality=quality, optimize=True)
-                jpeg_data = buffer.getvalue()
+            # Encoding is CPU-bound, so keep it off the event loop
+            jpeg_data = await asyncio.to_thread(png_to_jpeg, screenshot_data, quality)
 
             # Get size reduction info for logging
             png_size = len(screenshot_data) / 1024
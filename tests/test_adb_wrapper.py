@@ -1,6 +1,8 @@
 """Tests for the ADB wrapper module."""
 
+import asyncio
 import shutil
+import sys
 import tempfile
 import unittest
 from unittest.mock import AsyncMock, patch
@@ -8,7 +10,7 @@ from unittest.mock import AsyncMock, patch
 import pytest
 import pytest_asyncio
 
-from droidmind.adb import ADBWrapper
+from droidmind.adb import ADBWrapper, PersistentShell
 
 
 class TestADBWrapper(unittest.TestCase):
@@ -182,3 +184,269 @@ class TestADBWrapperAsync:
             "ro.product.model": "Pixel 4",
         }
         wrapper.shell.assert_called_once_with("device1", "getprop")
+
+    async def test_get_device_properties_empty_values(self, wrapper):
+        """Test that getprop entries with empty values are kept."""
+        wrapper.shell = AsyncMock(
+            return_value="[ro.product.model]: [Pixel 4]\n[persist.sys.locale]: []\ngarbage line\n"
+        )
+
+        result = await wrapper.get_device_properties("device1")
+
+        assert result == {"ro.product.model": "Pixel 4", "persist.sys.locale": ""}
+
+    async def test_get_devices_reads_properties_once(self):
+        """Test that get_devices fetches each device's properties in one getprop call."""
+        wrapper = ADBWrapper()
+        wrapper._run_adb_command = AsyncMock(
+            return_value=("List of devices attached\ndevice1\tdevice model:Pixel_4\noffline1\toffline", "")
+        )
+        wrapper._run_adb_device_command = AsyncMock(
+            return_value=("[ro.product.model]: [Pixel 4]\n[ro.build.version.release]: [11]\n", "")
+        )
+
+        result = await wrapper.get_devices()
+
+        assert result == [{"serial": "device1", "status": "device", "model": "Pixel 4", "android_version": "11"}]
+        wrapper._run_adb_device_command.assert_called_once_with("device1", ["shell", "getprop"], check=False)
+
+    async def test_get_device_property_caches_read_only(self, wrapper):
+        """Test that ro.* properties are cached until the device disconnects."""
+        wrapper._run_adb_device_command = AsyncMock(return_value=("Pixel 4\n", ""))
+
+        assert await wrapper.get_device_property("device1:5555", "ro.product.model") == "Pixel 4"
+        assert await wrapper.get_device_property("device1:5555", "ro.product.model") == "Pixel 4"
+        wrapper._run_adb_device_command.assert_called_once()
+
+        # Mutable properties are always read from the device
+        await wrapper.get_device_property("device1:5555", "sys.boot_completed")
+        await wrapper.get_device_property("device1:5555", "sys.boot_completed")
+        assert wrapper._run_adb_device_command.call_count == 3
+
+        # Disconnecting invalidates the cache
+        wrapper._run_adb_command = AsyncMock(return_value=("disconnected device1:5555", ""))
+        await wrapper.disconnect_device("device1:5555")
+        await wrapper.get_device_property("device1:5555", "ro.product.model")
+        assert wrapper._run_adb_device_command.call_count == 4
+
+    async def test_shell_skips_connection_check_after_success(self, wrapper):
+        """Test that a recent successful command stands in for the connection check."""
+        wrapper._run_adb_device_command = AsyncMock(return_value=("command output", ""))
+        wrapper._run_adb_command = AsyncMock(return_value=("List of devices attached\ndevice1\tdevice", ""))
+
+        await wrapper.shell("device1", "ls")
+        await wrapper.shell("device1", "ls")
+
+        wrapper._run_adb_command.assert_called_once_with(["devices"], check=False)
+        assert wrapper._run_adb_device_command.call_count == 2
+
+    async def test_capture_screenshot_streams_png(self, wrapper, tmp_path):
+        """Test that screenshots are streamed over exec-out and written locally."""
+        wrapper._run_adb_command_raw = AsyncMock(return_value=(b"\x89PNG fake image", b""))
+        local_path = tmp_path / "shots" / "screen.png"
+
+        result = await wrapper.capture_screenshot("device1", str(local_path))
+
+        assert result == str(local_path)
+        assert local_path.read_bytes() == b"\x89PNG fake image"
+        wrapper._run_adb_command_raw.assert_called_once_with(["-s", "device1", "exec-out", "screencap -p"], None, True)
+
+    async def test_capture_screenshot_rejects_error_output(self, wrapper, tmp_path):
+        """Test that screencap error text is reported rather than saved as an image."""
+        wrapper._devices_cache = [{"serial": "device1"}]
+        wrapper._run_adb_command_raw = AsyncMock(return_value=(b"Error: failed to capture screenshot\n", b""))
+        local_path = tmp_path / "shot.png"
+
+        with pytest.raises(RuntimeError, match="failed to capture screenshot"):
+            await wrapper.capture_screenshot("device1", str(local_path))
+
+        assert not local_path.exists()
+
+    async def test_install_app_rejects_unreadable_path(self, wrapper, tmp_path):
+        """Test that an APK path that can't be stat'ed is reported as not found."""
+        not_a_dir = tmp_path / "file"
+        not_a_dir.write_text("")
+
+        with pytest.raises(ValueError, match="APK file not found"):
+            await wrapper.install_app("device1", str(not_a_dir / "app.apk"))
+
+    async def test_push_file_rejects_unreadable_path(self, wrapper, tmp_path):
+        """Test that a local path that can't be stat'ed is reported as not found."""
+        not_a_dir = tmp_path / "file"
+        not_a_dir.write_text("")
+
+        with pytest.raises(ValueError, match="Local file not found"):
+            await wrapper.push_file("device1", str(not_a_dir / "data.txt"), "/sdcard/data.txt")
+
+    async def test_get_device_property_missing(self, wrapper):
+        """Test that an unknown property yields None without raising."""
+        wrapper._run_adb_device_command = AsyncMock(return_value=("", ""))
+
+        assert await wrapper.get_device_property("device1", "persist.does.not.exist") is None
+
+    async def test_get_devices_uses_cached_properties(self):
+        """Test that repeated listings reuse cached read-only properties."""
+        wrapper = ADBWrapper()
+        wrapper._run_adb_command = AsyncMock(return_value=("List of devices attached\ndevice1\tdevice", ""))
+        wrapper._run_adb_device_command = AsyncMock(
+            return_value=("[ro.product.model]: [Pixel 4]\n[ro.build.version.release]: [11]\n[sys.x]: [1]\n", "")
+        )
+
+        first = await wrapper.get_devices()
+        second = await wrapper.get_devices()
+
+        assert first == second
+        assert second[0]["model"] == "Pixel 4"
+        wrapper._run_adb_device_command.assert_called_once()
+
+        # A device that drops off the list loses its cached properties
+        wrapper._run_adb_command.return_value = ("List of devices attached\n", "")
+        await wrapper.get_devices()
+        wrapper._run_adb_command.return_value = ("List of devices attached\ndevice1\tdevice", "")
+        await wrapper.get_devices()
+        assert wrapper._run_adb_device_command.call_count == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(sys.platform == "win32", reason="uses a POSIX shell as a stand-in for adb")
+class TestPersistentShell:
+    """Test PersistentShell against a local shell standing in for `adb shell`."""
+
+    @pytest.fixture
+    def fake_adb(self, tmp_path):
+        """Create a fake adb binary that drops `-s <serial> shell` and runs sh."""
+        script = tmp_path / "adb"
+        script.write_text("#!/bin/sh\nshift 3\nexec sh\n")
+        script.chmod(0o755)
+        return str(script)
+
+    async def test_run_returns_output_and_status(self, fake_adb):
+        """Test that commands share one session and report their exit status."""
+        async with PersistentShell(fake_adb, "device1") as shell:
+            assert await shell.run("echo hello; echo world") == ("hello\nworld", 0)
+            assert await shell.run("printf 'no newline'") == ("no newline", 0)
+            assert await shell.run("false") == ("", 1)
+            assert await shell.run("echo oops >&2; exit_code=3; (exit $exit_code)") == ("oops", 3)
+
+        assert shell.closed
+
+    async def test_run_batch(self, fake_adb):
+        """Test that a batch returns one result per command, in order."""
+        async with PersistentShell(fake_adb, "device1") as shell:
+            results = await shell.run_batch(["echo one", "false", "printf two", "echo three"])
+
+        assert results == [("one", 0), ("", 1), ("two", 0), ("three", 0)]
+
+    async def test_run_large_output(self, fake_adb):
+        """Test that output spanning many reads is returned whole."""
+        async with PersistentShell(fake_adb, "device1") as shell:
+            output, status = await shell.run("head -c 300000 /dev/zero | tr '\\0' a")
+            assert await shell.run("echo next") == ("next", 0)
+
+        assert (output, status) == ("a" * 300000, 0)
+
+    async def test_run_large_batch(self, fake_adb):
+        """Test that a batch larger than the pipe buffers doesn't stall while writing."""
+        commands = [f"head -c 200 /dev/zero | tr '\\0' {i % 10}" for i in range(2000)]
+
+        async with PersistentShell(fake_adb, "device1") as shell:
+            results = await shell.run_batch(commands, timeout_seconds=30)
+
+        assert results == [(str(i % 10) * 200, 0) for i in range(2000)]
+
+    async def test_command_cannot_consume_later_input(self, fake_adb):
+        """Test that a command reading stdin doesn't swallow the rest of the session."""
+        async with PersistentShell(fake_adb, "device1") as shell:
+            assert await shell.run("cat") == ("", 0)
+            assert await shell.run("echo still here") == ("still here", 0)
+
+    async def test_timeout_closes_session(self, fake_adb):
+        """Test that a timed-out command leaves the session closed rather than out of sync."""
+        async with PersistentShell(fake_adb, "device1") as shell:
+            with pytest.raises(RuntimeError, match="timed out"):
+                await shell.run("while :; do :; done", timeout_seconds=0.1)
+            assert shell.closed
+
+            with pytest.raises(RuntimeError, match="closed"):
+                await shell.run("echo hi")
+
+    async def test_cancel_closes_session(self, fake_adb):
+        """Test that a cancelled command's output can't leak into the next command."""
+        async with PersistentShell(fake_adb, "device1") as shell:
+            task = asyncio.create_task(shell.run("sleep 0.3; echo STALE"))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert shell.closed
+
+            with pytest.raises(RuntimeError, match="closed"):
+                await shell.run("echo fresh")
+
+    async def test_wrapper_reuses_and_closes_session(self, fake_adb):
+        """Test that the wrapper shares one session per device and closes it on disconnect."""
+        wrapper = ADBWrapper(adb_path=fake_adb)
+        wrapper._check_shell_target = AsyncMock()
+
+        shell = await wrapper.open_persistent_shell("10.0.0.2:5555")
+        assert await wrapper.open_persistent_shell("10.0.0.2:5555") is shell
+
+        wrapper._run_adb_command = AsyncMock(return_value=("disconnected 10.0.0.2:5555", ""))
+        assert await wrapper.disconnect_device("10.0.0.2:5555") is True
+        assert shell.closed
+
+    async def test_session_shell_runs_in_shared_session(self, fake_adb):
+        """Test that session_shell reuses the device's session and is closed when the device goes away."""
+        wrapper = ADBWrapper(adb_path=fake_adb)
+        wrapper._check_shell_target = AsyncMock()
+
+        assert await wrapper.session_shell("device1", "echo hello") == "hello"
+        shell = wrapper._shells["device1"]
+        with pytest.raises(RuntimeError, match="exit status 3: nope"):
+            await wrapper.session_shell("device1", "echo nope; (exit 3)")
+        assert await wrapper.session_shell("device1", "echo again") == "again"
+        assert wrapper._shells["device1"] is shell
+
+        wrapper._run_adb_command = AsyncMock(return_value=("List of devices attached\n", ""))
+        await wrapper.get_devices()
+        assert shell.closed
+        assert "device1" not in wrapper._shells
+        assert "device1" not in wrapper._last_ok
+
+    async def test_concurrent_opens_share_one_session(self, fake_adb):
+        """Test that concurrent callers for one device get the same session."""
+        wrapper = ADBWrapper(adb_path=fake_adb)
+        wrapper._check_shell_target = AsyncMock()
+
+        first, second = await asyncio.gather(
+            wrapper.open_persistent_shell("device1"), wrapper.open_persistent_shell("device1")
+        )
+
+        assert first is second
+        await wrapper.close_persistent_shell("device1")
+        assert first.closed
+
+
+@pytest.mark.asyncio
+async def test_device_commands_are_limited_per_device():
+    """Test that commands queue per device without blocking other devices."""
+    running: dict[str, int] = {}
+    peak: dict[str, int] = {}
+
+    async def fake_command(args, _timeout_seconds=None, _check=True):
+        serial = args[1]
+        running[serial] = running.get(serial, 0) + 1
+        peak[serial] = max(peak.get(serial, 0), running[serial])
+        await asyncio.sleep(0.01)
+        running[serial] -= 1
+        return "", ""
+
+    with patch("droidmind.adb._MAX_CONCURRENT_DEVICE_COMMANDS", 2):
+        wrapper = ADBWrapper()
+        wrapper._run_adb_command = fake_command
+        await asyncio.gather(
+            *(wrapper._run_adb_device_command("device1", ["shell", "true"]) for _ in range(6)),
+            *(wrapper._run_adb_device_command("device2", ["shell", "true"]) for _ in range(2)),
+        )
+
+    assert peak == {"device1": 2, "device2": 2}
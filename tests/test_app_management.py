@@ -184,6 +184,24 @@ async def test_list_packages(mock_device_manager, mock_context):
     mock_device.get_app_list.assert_called_once_with(False)
 
 
+@pytest.mark.asyncio
+async def test_list_packages_with_app_names(mock_device_manager, mock_context):
+    """Test that app names for listed packages are fetched in one batched lookup."""
+    mock_device = mock_device_manager.get_device.return_value
+    mock_device.get_app_labels.return_value = {"com.example.app": "Example App"}
+
+    with patch("droidmind.tools.app_management.get_device_manager", return_value=mock_device_manager):
+        result = await app_operations(
+            serial="test_device",
+            action=AppAction.LIST_PACKAGES,
+            ctx=mock_context,
+            include_app_name=True,
+        )
+
+    assert "| Example App | `com.example.app` |" in result
+    mock_device.get_app_labels.assert_called_once_with(["com.example.app"])
+
+
 @pytest.mark.asyncio
 async def test_get_app_manifest(mock_device_manager, mock_context):
     """Test the get_app_manifest action via app_operations."""
@@ -1,10 +1,15 @@
 """Tests for the DeviceManager and Device classes."""
 
+import asyncio
+import io
+import os
+from pathlib import Path
 from unittest.mock import AsyncMock, patch
 
+from PIL import Image
 import pytest
 
-from droidmind.devices import Device, DeviceManager, get_device_manager
+from droidmind.devices import Device, DeviceManager, DeviceSnapshot, get_device_manager
 
 
 class TestDeviceManager:
@@ -41,6 +46,19 @@ class TestDeviceManager:
         # Check that the ADB wrapper's get_devices method was called
         device_manager._adb.get_devices.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_list_devices_eager(self, device_manager):
+        """Test that eager listing prefetches properties and tolerates failures."""
+        device_manager._adb.get_device_properties = AsyncMock(
+            side_effect=[{"ro.product.model": "Pixel 4"}, RuntimeError("device offline")]
+        )
+
+        devices = await device_manager.list_devices(eager=True)
+
+        assert len(devices) == 2
+        assert device_manager._adb.get_device_properties.call_count == 2
+        assert await devices[0].model == "Pixel 4"
+
     @pytest.mark.asyncio
     async def test_get_device_existing(self, device_manager):
         """Test getting an existing device."""
@@ -66,6 +84,22 @@ class TestDeviceManager:
         # Check that the ADB wrapper's get_devices method was called
         device_manager._adb.get_devices.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_get_device_reuses_recent_listing(self, device_manager):
+        """Test that lookups in quick succession share one device listing."""
+        assert await device_manager.get_device("device1") is not None
+        assert await device_manager.get_device("192.168.1.100%3A5555") is not None
+        assert await device_manager.get_device("nonexistent") is None
+
+        device_manager._adb.get_devices.assert_called_once()
+
+        # Connecting invalidates the cached listing
+        device_manager._adb.connect_device_tcp = AsyncMock(return_value="connected to 192.168.1.101:5555")
+        await device_manager.connect("192.168.1.101")
+        await device_manager.list_devices()
+
+        assert device_manager._adb.get_devices.call_count == 2
+
     @pytest.mark.asyncio
     async def test_connect(self, device_manager):
         """Test connecting to a device over TCP/IP."""
@@ -146,6 +180,7 @@ class TestDevice:
 
             # Mock other methods
             mock_adb.shell = AsyncMock(return_value="command output")
+            mock_adb.session_shell = AsyncMock(return_value="command output")
             mock_adb.reboot_device = AsyncMock(return_value="Device rebooted")
 
             # Create the Device
@@ -166,6 +201,28 @@ class TestDevice:
         # Check that the ADB wrapper's get_device_properties method was called
         device._adb.get_device_properties.assert_called_once_with("device1")
 
+    @pytest.mark.asyncio
+    async def test_get_properties_shares_inflight_fetch(self, device):
+        """Test that concurrent callers share a single getprop call."""
+        first, second = await asyncio.gather(device.get_properties(), device.get_properties())
+
+        assert first is second
+        device._adb.get_device_properties.assert_called_once_with("device1")
+
+    @pytest.mark.asyncio
+    async def test_snapshot(self, device):
+        """Test reading the common properties in one go."""
+        snapshot = await device.snapshot()
+
+        assert snapshot == DeviceSnapshot(
+            model="Pixel 4",
+            brand="Google",
+            android_version="11",
+            sdk_level="30",
+            build_number="RQ3A.211001.001",
+        )
+        device._adb.get_device_properties.assert_called_once_with("device1")
+
     @pytest.mark.asyncio
     async def test_model_property(self, device):
         """Test the model property."""
@@ -191,6 +248,68 @@ class TestDevice:
         # The implementation now adds "| head -n 500" to commands that might produce large output
         device._adb.shell.assert_called_once_with("device1", "ls -la | head -n 500")
 
+    @pytest.mark.asyncio
+    async def test_get_logcat_summarizes_large_output(self, device):
+        """Test that large logcat output is prefixed with a per-level summary."""
+        lines = [
+            "10-15 12:00:00.000  1234  1250 I ActivityManager: Start proc 4321:com.example/u0a123 for D x",
+            "10-15 12:00:00.001  4321  4321 E AndroidRuntime: FATAL EXCEPTION: main",
+            "W/PackageManager(  567): Unknown permission android.permission.I ",
+            "\tat com.example.MainActivity.onCreate(MainActivity.java:12)",
+        ] * 400
+        lines.append("--------- beginning of main")
+        output = "\n".join(lines)
+        device._adb.shell.return_value = output
+
+        result = await device.get_logcat()
+
+        assert result.startswith("## Logcat Summary\nTotal lines: 1200\n")
+        assert "| Info | 400 | 33.3% |" in result
+        assert "| Error | 400 | 33.3% |" in result
+        assert "| Warning | 400 | 33.3% |" in result
+        assert "| Debug | 0 | 0.0% |" in result
+        assert result.endswith(output)
+
+    @pytest.mark.asyncio
+    async def test_run_shell_batch(self, device):
+        """Test running several commands through the persistent shell."""
+        shell = AsyncMock()
+        shell.run_batch.return_value = [("Pixel 4", 0), ("", 1)]
+        device._adb.open_persistent_shell = AsyncMock(return_value=shell)
+
+        result = await device.run_shell_batch(["getprop ro.product.model", "false"])
+
+        assert result == ["Pixel 4", ""]
+        device._adb.open_persistent_shell.assert_called_once_with("device1")
+        shell.run_batch.assert_called_once_with(["getprop ro.product.model", "false"])
+
+    @pytest.mark.asyncio
+    async def test_run_shell_truncates_large_output(self, device):
+        """Test that oversized output keeps its head and tail lines."""
+        device._adb.shell.return_value = "\n".join(f"line {i:04d}" for i in range(2000))
+
+        result = await device.run_shell("echo", max_lines=10, max_size=1000)
+
+        assert result.startswith("line 0000\nline 0001\nline 0002\nline 0003\nline 0004\n\n... 1990 lines omitted")
+        assert "line 1999\n\n[Output truncated: 19999 chars, 2000 lines]" in result
+
+    @pytest.mark.asyncio
+    async def test_get_app_labels(self, device):
+        """Test that app labels for several packages come from a single shell call."""
+        device._adb.shell.return_value = (
+            "PKG:com.android.chrome\n"
+            "    application-label:'Chrome'\n"
+            "PKG:com.example.nolabel\n"
+            "PKG:com.example.app\n"
+            "    application-label-en:Example App\n"
+        )
+
+        labels = await device.get_app_labels(["com.android.chrome", "com.example.nolabel", "com.example.app"])
+
+        assert labels == {"com.android.chrome": "Chrome", "com.example.app": "Example App"}
+        device._adb.shell.assert_called_once()
+        assert "for p in com.android.chrome com.example.nolabel com.example.app;" in device._adb.shell.call_args.args[1]
+
     @pytest.mark.asyncio
     async def test_reboot(self, device):
         """Test rebooting the device."""
@@ -243,6 +362,29 @@ class TestDevice:
         # Since we're now mocking list_directory directly, we assert that it was called with the right path
         device.list_directory.assert_called_once_with("/sdcard")
 
+    @pytest.mark.asyncio
+    async def test_take_screenshot(self, device):
+        """Test that screenshots are streamed from the device."""
+        device._adb.screencap = AsyncMock(return_value=b"\x89PNG fake image")
+
+        result = await device.take_screenshot()
+
+        assert result == b"\x89PNG fake image"
+        device._adb.screencap.assert_called_once_with("device1")
+
+    @pytest.mark.asyncio
+    async def test_take_screenshot_preview(self, device):
+        """Test that previews are downscaled JPEGs."""
+        png = io.BytesIO()
+        Image.new("RGBA", (1080, 2400), (255, 0, 0, 255)).save(png, format="PNG")
+        device._adb.screencap = AsyncMock(return_value=png.getvalue())
+
+        result = await device.take_screenshot_preview(max_dim=720)
+
+        with Image.open(io.BytesIO(result)) as img:
+            assert img.format == "JPEG"
+            assert max(img.size) == 720
+
     @pytest.mark.asyncio
     async def test_push_file(self, device):
         """Test pushing a file to the device."""
@@ -277,7 +419,7 @@ class TestDevice:
     async def test_read_file(self, device):
         """Test reading a file from the device."""
         # Mock the shell command output
-        device._adb.shell.side_effect = ["1024", "This is the content of the file"]
+        device._adb.shell.return_value = "This is the content of the file"
 
         # Call the method
         result = await device.read_file("/sdcard/file.txt")
@@ -285,12 +427,62 @@ class TestDevice:
         # Verify the result
         assert result == "This is the content of the file"
 
-        # Check that the ADB shell method was called with the expected commands
-        # First call checks the file size
-        # Second call reads the file content
-        assert device._adb.shell.call_count == 2
-        device._adb.shell.assert_any_call("device1", "wc -c '/sdcard/file.txt'")
-        device._adb.shell.assert_any_call("device1", "cat '/sdcard/file.txt'")
+        # The size check and the read happen in a single shell call
+        device._adb.shell.assert_called_once()
+        command = device._adb.shell.call_args.args[1]
+        assert "wc -c < /sdcard/file.txt" in command
+        assert "-gt 100000" in command
+        assert "cat /sdcard/file.txt" in command
+
+    @pytest.mark.asyncio
+    async def test_read_file_too_large(self, device):
+        """Test reading a file that exceeds the size limit."""
+        device._adb.shell.return_value = "__DROIDMIND_FILE_TOO_LARGE__:2048"
+
+        result = await device.read_file("/sdcard/big.bin", max_size=1024)
+
+        assert result.startswith("File is too large (2048 bytes)")
+        device._adb.shell.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_write_file(self, device):
+        """Test that file content is pushed to the device through a temporary file."""
+        pushed = {}
+
+        def fake_push(serial, local_path, device_path):
+            pushed["content"] = Path(local_path).read_text(encoding="utf-8")
+            pushed["local_path"] = local_path
+            return f"Successfully pushed {local_path} to {device_path}"
+
+        device._adb.push_file = AsyncMock(side_effect=fake_push)
+
+        with patch("droidmind.devices.os.unlink", wraps=os.unlink) as unlink:
+            result = await device.write_file("/sdcard/my notes.txt", "hello\n")
+
+        assert result == "Successfully wrote to /sdcard/my notes.txt"
+        assert pushed["content"] == "hello\n"
+        assert device._adb.push_file.call_args.args[2] == "/sdcard/my notes.txt"
+        unlink.assert_called_once_with(pushed["local_path"])
+
+    @pytest.mark.asyncio
+    async def test_write_file_push_failure(self, device):
+        """Test that a failed push is reported and the temporary file is still removed."""
+        local_paths = []
+
+        def failing_push(serial, local_path, device_path):
+            local_paths.append(local_path)
+            raise RuntimeError("File push failed: remote couldn't create file: Permission denied")
+
+        device._adb.push_file = AsyncMock(side_effect=failing_push)
+
+        with (
+            patch("droidmind.devices.os.unlink", wraps=os.unlink) as unlink,
+            pytest.raises(RuntimeError, match="Permission denied"),
+        ):
+            await device.write_file("/system/readonly.txt", "hello\n")
+
+        assert len(local_paths) == 1
+        unlink.assert_called_once_with(local_paths[0])
 
     @pytest.mark.asyncio
     async def test_create_directory(self, device):
@@ -305,13 +497,13 @@ class TestDevice:
         assert result == "Successfully created directory /sdcard/new_folder"
 
         # Check that the ADB shell method was called with the expected command
-        device._adb.shell.assert_called_once_with("device1", "mkdir -p '/sdcard/new_folder'")
+        device._adb.shell.assert_called_once_with("device1", "mkdir -p /sdcard/new_folder")
 
     @pytest.mark.asyncio
     async def test_delete_file(self, device):
         """Test deleting a file from the device."""
-        # Mock the shell command outputs for file_exists check and delete
-        device._adb.shell.side_effect = ["file", ""]  # First check file type, then delete
+        # Mock the shell command output
+        device._adb.shell.return_value = ""  # Successful rm returns nothing
 
         # Call the method
         result = await device.delete_file("/sdcard/file.txt")
@@ -319,18 +511,28 @@ class TestDevice:
         # Verify the result
         assert result == "Successfully deleted /sdcard/file.txt"
 
-        # Check that the ADB shell method was called with the expected commands
-        assert device._adb.shell.call_count == 2
-        # First call should check if it's a file or directory
-        device._adb.shell.assert_any_call("device1", "[ -d '/sdcard/file.txt' ] && echo 'directory' || echo 'file'")
-        # Second call should delete the file
-        device._adb.shell.assert_any_call("device1", "rm '/sdcard/file.txt'")
+        # The directory check and the delete happen in a single shell call
+        device._adb.shell.assert_called_once_with(
+            "device1", "if [ -d /sdcard/file.txt ]; then rm -rf /sdcard/file.txt; else rm /sdcard/file.txt; fi"
+        )
+
+    @pytest.mark.asyncio
+    async def test_delete_file_quotes_path(self, device):
+        """Test that paths containing quotes and spaces are shell-quoted."""
+        device._adb.shell.return_value = ""
+
+        await device.delete_file("/sdcard/Bob's file.txt")
+
+        quoted = "'/sdcard/Bob'\"'\"'s file.txt'"
+        device._adb.shell.assert_called_once_with(
+            "device1", f"if [ -d {quoted} ]; then rm -rf {quoted}; else rm {quoted}; fi"
+        )
 
     @pytest.mark.asyncio
     async def test_file_exists(self, device):
         """Test checking if a file exists on the device."""
         # Mock the shell command output for existing file
-        device._adb.shell.return_value = "0"  # [ -e FILE ] returns 0 if file exists
+        device._adb.session_shell.return_value = "0"  # [ -e FILE ] returns 0 if file exists
 
         # Call the method
         result = await device.file_exists("/sdcard/file.txt")
@@ -338,14 +540,14 @@ class TestDevice:
         # Verify the result
         assert result is True
 
-        # Check that the ADB shell method was called with the expected command
-        device._adb.shell.assert_called_once_with("device1", "[ -e '/sdcard/file.txt' ] && echo 0 || echo 1")
+        # Check that the persistent shell session was called with the expected command
+        device._adb.session_shell.assert_called_once_with("device1", "[ -e /sdcard/file.txt ] && echo 0 || echo 1")
 
         # Reset the mock
-        device._adb.shell.reset_mock()
+        device._adb.session_shell.reset_mock()
 
         # Mock the shell command output for non-existing file
-        device._adb.shell.return_value = "1"  # [ -e FILE ] returns 1 if file doesn't exist
+        device._adb.session_shell.return_value = "1"  # [ -e FILE ] returns 1 if file doesn't exist
 
         # Call the method again
         result = await device.file_exists("/sdcard/nonexistent.txt")
@@ -353,5 +555,7 @@ class TestDevice:
         # Verify the result
         assert result is False
 
-        # Check that the ADB shell method was called with the expected command
-        device._adb.shell.assert_called_once_with("device1", "[ -e '/sdcard/nonexistent.txt' ] && echo 0 || echo 1")
+        # Check that the persistent shell session was called with the expected command
+        device._adb.session_shell.assert_called_once_with(
+            "device1", "[ -e /sdcard/nonexistent.txt ] && echo 0 || echo 1"
+        )
@@ -0,0 +1,18 @@
+"""Tests for the package list parser."""
+
+from droidmind.packages import parse_package_list
+
+
+def test_parse_package_list():
+    """Test parsing 'pm list packages -f' output."""
+    output = (
+        "package:/data/app/~~abc==/com.example.app-1/base.apk=com.example.app\n"
+        "package:/system/app/Settings/Settings.apk=com.android.settings\r\n"
+        "not a package line\n"
+        "package:/data/app/broken.apk\n"
+    )
+
+    assert parse_package_list(output) == [
+        {"package": "com.example.app", "path": "/data/app/~~abc==/com.example.app-1/base.apk"},
+        {"package": "com.android.settings", "path": "/system/app/Settings/Settings.apk"},
+    ]
@@ -7,7 +7,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from mcp.server.fastmcp import Context, Image
 import pytest
 
-from droidmind.devices import Device
+from droidmind.devices import Device, DeviceSnapshot
 from droidmind.tools import (
     android_device,  # Import the unified tool
     screenshot as capture_screenshot,
@@ -58,6 +58,15 @@ def mock_device():
             "ro.build.id": "RQ3A.211001.001",
         }
     )
+    device.snapshot = AsyncMock(
+        return_value=DeviceSnapshot(
+            model="Pixel 4",
+            brand="Google",
+            android_version="11",
+            sdk_level="30",
+            build_number="RQ3A.211001.001",
+        )
+    )
     device.run_shell = AsyncMock(return_value="Command output")
     device.take_screenshot = AsyncMock(return_value=b"FAKE_SCREENSHOT_DATA")
     device.reboot = AsyncMock()